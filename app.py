@@ -1,16 +1,29 @@
 import datetime as dt
+import functools
 import io
 import base64
+import os
+import tempfile
+import threading
+import uuid
+
+import diskcache
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import numpy as np
 import pandas as pd
-from dash import Dash, html, dcc, Input, Output, State, callback, no_update, ctx
+from dash import Dash, DiskcacheManager, html, dcc, Input, Output, State, Patch, callback, no_update, ctx
 import plotly.graph_objects as go
 import plotly.io as pio
+from plotly_resampler import FigureResampler
 
 from fpdf import FPDF
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 
-from project import fetch_daily_temp, compute_daily_gdd, determine_growing_stage, CropSeason
+from project import fetch_daily_temp, compute_daily_gdd_vectorized, determine_growing_stage, CropSeason
 from crops_data import crops
 
 
@@ -18,6 +31,67 @@ from crops_data import crops
 # Helper functions
 # ---------------------------------------------------------------------------
 
+# Shared HTTP session with keep-alive and retries for Open-Meteo calls. Reuse
+# only helps geocode_location, which runs in the main process; fetch_climate_temp
+# runs inside compute_gdd's per-job background process, so its pool starts cold.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(total=2, backoff_factor=0.3),
+))
+
+# On-disk cache of climate projections, shared across app restarts
+_CLIMATE_CACHE = diskcache.Cache(os.path.join(tempfile.gettempdir(), "gdd_cache"))
+
+# Serialize figures (including Dash callback payloads) with orjson
+pio.json.config.default_engine = "orjson"
+
+# Static image export defaults; skipping MathJax shortens Kaleido start-up
+pio.defaults.default_format = "png"
+pio.defaults.mathjax = None
+
+# Growth stages in phenological order and their chart colors
+_STAGE_ORDER = ("initial", "development", "mid_season", "harvest")
+_STAGE_COLORS = {
+    "initial": "#2ca02c",
+    "development": "#ff7f0e",
+    "mid_season": "#d62728",
+    "harvest": "#9467bd",
+}
+
+# Keep trace names unchanged when plotly-resampler aggregates a series
+# (no "[R]" prefix or "~1D" bin-size suffix in the legend)
+_RESAMPLER_KWARGS = dict(
+    resampled_trace_prefix_suffix=("", ""),
+    show_mean_aggregation_size=False,
+)
+
+# Layout shared by the Mode A and Mode B GDD charts
+_CHART_LAYOUT_BASE = dict(
+    template="plotly_white",
+    height=400,
+    xaxis_title="Days since planting",
+    yaxis_title="Cumulative GDD",
+)
+
+
+def _planning_window_days(params):
+    """Days of climate projection to fetch for a crop in Mode B.
+
+    The fastest possible time to harvest (every day at the maximum GDD) plus a
+    60-day margin, capped at one year.
+    """
+    max_daily = params["t_upper"] - params["t_base"]
+    if max_daily <= 0:
+        return 365
+    return min(int(params["stages"]["harvest"] / max_daily) + 60, 365)
+
+
+_PLANNING_WINDOW_DAYS = {cid: _planning_window_days(params) for cid, params in crops.items()}
+
+
+@functools.lru_cache(maxsize=256)
 def geocode_location(place_name):
     """Search for a place name using Open-Meteo Geocoding API.
 
@@ -40,7 +114,7 @@ def geocode_location(place_name):
             "language": "en",
             "format": "json",
         }
-        response = requests.get(url, params=params, timeout=10)
+        response = _SESSION.get(url, params=params, timeout=10)
         response.raise_for_status()
         data = response.json()
         results = data.get("results", [])
@@ -65,7 +139,16 @@ def geocode_location(place_name):
 
 
 def fetch_climate_temp(latitude, longitude, start_date, end_date):
-    """Fetch projected daily temperatures from the Open-Meteo Climate API."""
+    """Fetch projected daily temperatures from the Open-Meteo Climate API.
+
+    Results are cached on disk keyed by coordinates rounded to 3 decimals, so
+    small lat/lon jitter still reuses an earlier response.
+    """
+    cache_key = (round(latitude, 3), round(longitude, 3), start_date, end_date)
+    cached = _CLIMATE_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
     url = "https://climate-api.open-meteo.com/v1/climate"
     params = {
         "latitude": latitude,
@@ -76,7 +159,7 @@ def fetch_climate_temp(latitude, longitude, start_date, end_date):
         "models": "EC_Earth3P_HR",
     }
 
-    response = requests.get(url, params=params, timeout=30)
+    response = _SESSION.get(url, params=params, timeout=30)
     response.raise_for_status()
     data = response.json()
 
@@ -89,39 +172,49 @@ def fetch_climate_temp(latitude, longitude, start_date, end_date):
         return pd.DataFrame(columns=["date", "tmin", "tmax"])
 
     df = pd.DataFrame({
-        "date": pd.to_datetime(dates),
-        "tmin": [float(t) if t is not None else 0.0 for t in tmins],
-        "tmax": [float(t) if t is not None else 0.0 for t in tmaxs],
+        "date": pd.to_datetime(dates, format="%Y-%m-%d", cache=True),
+        "tmin": pd.to_numeric(pd.Series(tmins), errors="coerce").fillna(0.0),
+        "tmax": pd.to_numeric(pd.Series(tmaxs), errors="coerce").fillna(0.0),
     })
 
+    _CLIMATE_CACHE.set(cache_key, df)
     return df
 
 
+def map_view(lat=None, lon=None, location_name=""):
+    """Return the marker data and mapbox view for the given coordinates."""
+    if lat is None or lon is None:
+        marker = {"lat": [], "lon": [], "text": []}
+        return marker, {"center": {"lat": 20.0, "lon": 0.0}, "zoom": 1}
+
+    marker = {
+        "lat": [lat],
+        "lon": [lon],
+        "text": [location_name or f"{lat:.4f}, {lon:.4f}"],
+    }
+    return marker, {"center": {"lat": lat, "lon": lon}, "zoom": 10}
+
+
 def build_map_figure(lat=None, lon=None, location_name=""):
-    """Build a Plotly map figure centered on the given coordinates."""
-    center_lat = lat if lat is not None else 20.0
-    center_lon = lon if lon is not None else 0.0
-    zoom = 10 if lat is not None else 1
+    """Build a Plotly map figure centered on the given coordinates.
+
+    The marker trace is always present (empty without coordinates) so that
+    update_map can patch it in place instead of resending the figure.
+    """
+    marker, view = map_view(lat, lon, location_name)
 
     fig = go.Figure()
 
-    if lat is not None and lon is not None:
-        fig.add_trace(go.Scattermapbox(
-            lat=[lat],
-            lon=[lon],
-            mode="markers",
-            marker=dict(size=14, color="red"),
-            text=[location_name or f"{lat:.4f}, {lon:.4f}"],
-            hoverinfo="text",
-            name="Selected Location",
-        ))
+    fig.add_trace(go.Scattermapbox(
+        **marker,
+        mode="markers",
+        marker=dict(size=14, color="red"),
+        hoverinfo="text",
+        name="Selected Location",
+    ))
 
     fig.update_layout(
-        mapbox=dict(
-            style="open-street-map",
-            center=dict(lat=center_lat, lon=center_lon),
-            zoom=zoom,
-        ),
+        mapbox=dict(style="open-street-map", **view),
         margin=dict(l=0, r=0, t=0, b=0),
         height=250,
         showlegend=False,
@@ -130,31 +223,35 @@ def build_map_figure(lat=None, lon=None, location_name=""):
 
 
 def build_progress_chart(season):
-    """Build a Plotly chart for Mode A: actual GDD vs ideal GDD."""
-    fig = go.Figure()
+    """Build a Plotly chart for Mode A: actual GDD vs ideal GDD.
+
+    The full daily series goes to the resampler, which sends at most 2000
+    points per trace to the browser and restores detail on zoom.
+    """
+    fig = FigureResampler(go.Figure(), default_n_shown_samples=2000, **_RESAMPLER_KWARGS)
 
     actual_cumulative = season.weather["cumulative_gdd"]
     window_days = len(actual_cumulative)
-    x_days = list(range(1, window_days + 1))
+    x_days = np.arange(1, window_days + 1)
     t_base = season.params["t_base"]
     t_upper = season.params["t_upper"]
 
     upper_daily = t_upper - t_base
-    ideal_gdd = [upper_daily * i for i in x_days]
+    ideal_gdd = upper_daily * x_days.astype(np.float64)
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=x_days, y=ideal_gdd,
         mode="lines", name="Ideal GDD",
         line=dict(dash="dash", width=1.5, color="gray"),
     ))
 
-    fig.add_trace(go.Scatter(
-        x=x_days, y=actual_cumulative.tolist(),
+    fig.add_trace(go.Scattergl(
+        x=x_days, y=actual_cumulative.to_numpy(),
         mode="lines", name="Actual GDD",
         line=dict(width=2, color="#1f77b4"),
     ))
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=[x_days[-1]], y=[actual_cumulative.iloc[-1]],
         mode="markers", name="Current",
         marker=dict(size=10, color="#1f77b4"),
@@ -162,79 +259,62 @@ def build_progress_chart(season):
     ))
 
     stages = season.params["stages"]
-    colors = {
-        "initial": "#2ca02c",
-        "development": "#ff7f0e",
-        "mid_season": "#d62728",
-        "harvest": "#9467bd",
-    }
     for stage_name, gdd_threshold in stages.items():
         fig.add_hline(
             y=gdd_threshold,
             line_dash="dot",
-            line_color=colors.get(stage_name, "gray"),
+            line_color=_STAGE_COLORS.get(stage_name, "gray"),
             annotation_text=stage_name.replace("_", " ").title(),
             annotation_position="top left",
         )
 
     crop_label = season.crop_id.replace("_", " ").title()
     fig.update_layout(
+        **_CHART_LAYOUT_BASE,
         title=f"Cumulative GDD Progress \u2013 {crop_label} ({season.location})",
-        xaxis_title="Days since planting",
-        yaxis_title="Cumulative GDD",
-        template="plotly_white",
-        height=400,
     )
     return fig
 
 
 def build_planning_chart(weather_df, crop_params, crop_id, location_name, planting_date):
     """Build a Plotly chart for Mode B: projected GDD with stage thresholds."""
-    fig = go.Figure()
+    fig = FigureResampler(go.Figure(), **_RESAMPLER_KWARGS)
 
     t_base = crop_params["t_base"]
     t_upper = crop_params["t_upper"]
     stages = crop_params["stages"]
 
-    weather_df = weather_df.copy()
-    weather_df["daily_gdd"] = weather_df.apply(
-        lambda row: compute_daily_gdd(row["tmin"], row["tmax"], t_base, t_upper),
-        axis=1,
+    # Work on plain arrays; weather_df itself is left unmodified (and uncopied)
+    daily_gdd = compute_daily_gdd_vectorized(
+        weather_df["tmin"].to_numpy(), weather_df["tmax"].to_numpy(), t_base, t_upper,
     )
-    weather_df["cumulative_gdd"] = weather_df["daily_gdd"].cumsum()
+    projected_gdd = daily_gdd.cumsum()
 
-    x_days = list(range(1, len(weather_df) + 1))
-    projected_gdd = weather_df["cumulative_gdd"].tolist()
+    x_days = np.arange(1, len(projected_gdd) + 1)
 
     upper_daily = t_upper - t_base
-    ideal_gdd = [upper_daily * i for i in x_days]
+    ideal_gdd = upper_daily * x_days.astype(np.float64)
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=x_days, y=ideal_gdd,
         mode="lines", name="Ideal GDD",
         line=dict(dash="dash", width=1.5, color="gray"),
     ))
 
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=x_days, y=projected_gdd,
         mode="lines", name="Projected GDD (Climate Model)",
         line=dict(width=2, color="#ff7f0e"),
     ))
 
-    colors = {
-        "initial": "#2ca02c",
-        "development": "#ff7f0e",
-        "mid_season": "#d62728",
-        "harvest": "#9467bd",
-    }
+    # Daily GDD is never negative, so cumulative GDD is sorted and the first
+    # day reaching each threshold can be found by binary search
+    dates_arr = weather_df["date"].to_numpy()
     stage_dates = {}
     for stage_name, gdd_threshold in stages.items():
-        reached = weather_df[weather_df["cumulative_gdd"] >= gdd_threshold]
-        if not reached.empty:
-            day_idx = reached.index[0]
-            est_date = weather_df.loc[day_idx, "date"]
-            if hasattr(est_date, "date"):
-                est_date = est_date.date()
+        day_idx = np.searchsorted(projected_gdd, gdd_threshold, side="left")
+        if day_idx < len(projected_gdd):
+            est_date = pd.Timestamp(dates_arr[day_idx]).date()
             stage_dates[stage_name] = est_date
             annotation = f"{stage_name.replace('_', ' ').title()} ({est_date})"
         else:
@@ -243,18 +323,15 @@ def build_planning_chart(weather_df, crop_params, crop_id, location_name, planti
         fig.add_hline(
             y=gdd_threshold,
             line_dash="dot",
-            line_color=colors.get(stage_name, "gray"),
+            line_color=_STAGE_COLORS.get(stage_name, "gray"),
             annotation_text=annotation,
             annotation_position="top left",
         )
 
     crop_label = crop_id.replace("_", " ").title()
     fig.update_layout(
+        **_CHART_LAYOUT_BASE,
         title=f"Projected GDD \u2013 {crop_label} ({location_name})",
-        xaxis_title="Days since planting",
-        yaxis_title="Cumulative GDD",
-        template="plotly_white",
-        height=400,
     )
 
     return fig, stage_dates
@@ -262,18 +339,18 @@ def build_planning_chart(weather_df, crop_params, crop_id, location_name, planti
 
 def build_temperature_chart(weather_df, location_name, planting_date):
     """Build a Plotly chart showing daily Tmin and Tmax over time."""
-    fig = go.Figure()
+    fig = FigureResampler(go.Figure(), **_RESAMPLER_KWARGS)
 
-    dates = weather_df["date"]
+    dates = weather_df["date"].to_numpy()
 
-    fig.add_trace(go.Scatter(
-        x=dates, y=weather_df["tmax"],
+    fig.add_trace(go.Scattergl(
+        x=dates, y=weather_df["tmax"].to_numpy(),
         mode="lines", name="Tmax",
         line=dict(width=1.5, color="#d62728"),
     ))
 
-    fig.add_trace(go.Scatter(
-        x=dates, y=weather_df["tmin"],
+    fig.add_trace(go.Scattergl(
+        x=dates, y=weather_df["tmin"].to_numpy(),
         mode="lines", name="Tmin",
         line=dict(width=1.5, color="#1f77b4"),
         fill="tonexty",
@@ -290,15 +367,16 @@ def build_temperature_chart(weather_df, location_name, planting_date):
     return fig
 
 
-def build_stage_table(crop_params, crop_label):
+def build_stage_table(crop_id):
     """Build an HTML table showing cumulative GDD thresholds per growth stage."""
-    stages = crop_params["stages"]
+    stages = crops[crop_id]["stages"]
+    crop_label = crop_id.replace("_", " ").title()
     header = html.Tr([
         html.Th("Growth Stage", style={"padding": "6px 12px", "textAlign": "left"}),
         html.Th("Cumulative GDD", style={"padding": "6px 12px", "textAlign": "right"}),
     ])
     rows = []
-    for stage_name in ["initial", "development", "mid_season", "harvest"]:
+    for stage_name in _STAGE_ORDER:
         gdd = stages.get(stage_name, "N/A")
         rows.append(html.Tr([
             html.Td(stage_name.replace("_", " ").title(), style={"padding": "4px 12px"}),
@@ -320,8 +398,94 @@ def build_stage_table(crop_params, crop_label):
     ])
 
 
-def generate_pdf_report(report_data, chart_fig):
-    """Generate a 1-page PDF report and return it as bytes."""
+# PNG exports keyed by the figure's trace uids, oldest entry evicted first.
+# Flask serves downloads on several threads, so access goes through the lock.
+_PNG_CACHE = {}
+_PNG_CACHE_SIZE = 32
+_PNG_CACHE_LOCK = threading.Lock()
+
+
+def _render_png(chart_data):
+    """Render a stored Plotly figure dict to PNG with Kaleido, memoized per figure.
+
+    FigureResampler gives every trace a uid, so the tuple of uids is a cheap
+    per-figure key; the figure is only rebuilt and exported on a cache miss.
+    """
+    uids = tuple(trace.get("uid") for trace in chart_data.get("data", []))
+    cache_key = uids if uids and all(uids) else None
+    with _PNG_CACHE_LOCK:
+        cached = _PNG_CACHE.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Export outside the lock so a slow Kaleido call does not block other downloads
+    img_bytes = pio.to_image(go.Figure(chart_data), format="png", width=700, height=350)
+    if cache_key is not None:
+        with _PNG_CACHE_LOCK:
+            if cache_key not in _PNG_CACHE and len(_PNG_CACHE) >= _PNG_CACHE_SIZE:
+                _PNG_CACHE.pop(next(iter(_PNG_CACHE)))
+            _PNG_CACHE[cache_key] = img_bytes
+    return img_bytes
+
+
+def _trace_array(values):
+    """Return trace data from a stored figure dict as a NumPy array.
+
+    Plotly encodes NumPy arrays as base64 typed arrays ({"dtype", "bdata"})
+    when the figure is serialized into a dcc.Store.
+    """
+    if isinstance(values, dict) and "bdata" in values:
+        return np.frombuffer(base64.b64decode(values["bdata"]), dtype=values["dtype"])
+    return np.asarray(values)
+
+
+def _render_chart_png_matplotlib(report_data, chart_data):
+    """Draw the report's GDD chart with matplotlib and return it as PNG bytes.
+
+    Much cheaper than a Kaleido export. The GDD series is read from the stored
+    chart figure (trace 1) and the thresholds from crops, so no Plotly figure
+    needs to be built.
+    """
+    gdd_trace = chart_data["data"][1]
+    days = _trace_array(gdd_trace["x"]).astype(float)
+    gdd = _trace_array(gdd_trace["y"]).astype(float)
+    upper_daily = report_data["t_upper"] - report_data["t_base"]
+
+    if report_data.get("mode", "check") == "check":
+        title = f"Cumulative GDD Progress \u2013 {report_data['crop_label']} ({report_data['location']})"
+        gdd_label, gdd_color = "Actual GDD", "#1f77b4"
+    else:
+        title = f"Projected GDD \u2013 {report_data['crop_label']} ({report_data['location']})"
+        gdd_label, gdd_color = "Projected GDD (Climate Model)", "#ff7f0e"
+
+    fig = Figure(figsize=(7, 3.5), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    ax.plot(days, upper_daily * days, linestyle="--", linewidth=1.5, color="gray", label="Ideal GDD")
+    ax.plot(days, gdd, linewidth=2, color=gdd_color, label=gdd_label)
+
+    for stage_name, gdd_threshold in crops[report_data["crop_id"]]["stages"].items():
+        ax.axhline(gdd_threshold, linestyle=":", linewidth=1, color=_STAGE_COLORS.get(stage_name, "gray"))
+        ax.annotate(
+            stage_name.replace("_", " ").title(),
+            xy=(0, gdd_threshold), xycoords=("axes fraction", "data"),
+            xytext=(2, 2), textcoords="offset points", fontsize=7,
+        )
+
+    ax.set_title(title, fontsize=10)
+    ax.set_xlabel("Days since planting")
+    ax.set_ylabel("Cumulative GDD")
+    ax.legend(fontsize=8)
+    fig.tight_layout()
+
+    buf = io.BytesIO()
+    canvas.print_png(buf)
+    return buf.getvalue()
+
+
+def generate_pdf_report(report_data, chart_data):
+    """Generate a 1-page PDF report and return it as a bytearray."""
     pdf = FPDF()
     pdf.add_page()
     pdf.set_auto_page_break(auto=False)
@@ -370,9 +534,12 @@ def generate_pdf_report(report_data, chart_fig):
 
     pdf.ln(4)
 
-    # Chart image
+    # Chart image (matplotlib first, Kaleido export as fallback)
     try:
-        img_bytes = pio.to_image(chart_fig, format="png", width=700, height=350)
+        try:
+            img_bytes = _render_chart_png_matplotlib(report_data, chart_data)
+        except Exception:
+            img_bytes = _render_png(chart_data)
         img_stream = io.BytesIO(img_bytes)
         pdf.image(img_stream, x=10, w=190)
     except Exception:
@@ -384,14 +551,20 @@ def generate_pdf_report(report_data, chart_fig):
     pdf.set_font("Helvetica", "I", 8)
     pdf.cell(0, 5, "Data source: Open-Meteo (open-meteo.com) | Based on FAO56rev GDD framework", align="C")
 
-    return bytes(pdf.output())
+    # fpdf2 already returns a bytearray; returned as-is to avoid a copy
+    return pdf.output()
 
 
 # ---------------------------------------------------------------------------
 # Dash app
 # ---------------------------------------------------------------------------
 
-app = Dash(__name__)
+# Long-running callbacks (API fetches) run in worker processes managed on disk
+background_cache = diskcache.Cache("./.cache")
+app = Dash(
+    __name__,
+    background_callback_manager=DiskcacheManager(background_cache),
+)
 
 # Build crop name -> variants mapping from crops_data keys
 # Each key follows the pattern: {crop_name}_{variant}
@@ -407,190 +580,218 @@ crop_name_options = [
     for name in sorted(crop_variants.keys())
 ]
 
-app.layout = html.Div(
-    style={"display": "flex", "fontFamily": "Arial, sans-serif", "minHeight": "100vh"},
-    children=[
-        # --- Left panel: Inputs ---
-        html.Div(
-            style={
-                "width": "380px",
-                "padding": "20px",
-                "backgroundColor": "#f8f9fa",
-                "borderRight": "1px solid #dee2e6",
-                "overflowY": "auto",
-            },
-            children=[
-                html.H2("GDD Crop Phenology Tracker", style={"marginTop": 0}),
-                html.Hr(),
-
-                # Map
-                dcc.Graph(id="map-graph", figure=build_map_figure(),
-                          config={"scrollZoom": True},
-                          style={"marginBottom": "12px"}),
-
-                # Location search
-                html.Label("Search Location", style={"fontWeight": "bold"}),
-                dcc.Input(
-                    id="input-search",
-                    type="text",
-                    placeholder="e.g. La Trinidad, Benguet",
-                    style={"width": "100%", "marginBottom": "6px"},
-                ),
-                html.Button(
-                    "Search",
-                    id="btn-search",
-                    n_clicks=0,
-                    style={"width": "100%", "marginBottom": "12px"},
-                ),
-
-                # Lat / Lon
-                html.Div(style={"display": "flex", "gap": "10px", "marginBottom": "12px"}, children=[
-                    html.Div(style={"flex": 1}, children=[
-                        html.Label("Latitude"),
-                        dcc.Input(id="input-lat", type="number", style={"width": "100%"}),
+# Download button styles returned by compute_gdd
+_DOWNLOAD_BTN_VISIBLE = {
+    "width": "100%",
+    "padding": "10px",
+    "backgroundColor": "#007bff",
+    "color": "white",
+    "border": "none",
+    "borderRadius": "4px",
+    "fontWeight": "bold",
+    "fontSize": "14px",
+    "cursor": "pointer",
+    "marginTop": "12px",
+    "display": "block",
+}
+_DOWNLOAD_BTN_HIDDEN = {"display": "none"}
+
+# Stage tables depend only on the crop. Built at import so the forked
+# background workers running compute_gdd inherit them.
+_STAGE_TABLES = {cid: build_stage_table(cid) for cid in crops}
+
+_VARIANT_OPTIONS = {
+    name: [{"label": v.title(), "value": v} for v in variants]
+    for name, variants in crop_variants.items()
+}
+
+# Latest resampled figures keyed by (session id, dcc.Graph id). plotly-resampler
+# keeps the full-resolution data server-side and only sends the visible range
+# on zoom. Kept on disk because compute_gdd builds them in a background worker
+# process; entries expire so abandoned sessions do not accumulate.
+resampled_figures = diskcache.Cache(os.path.join(".cache", "figures"))
+_RESAMPLED_FIGURE_TTL = 60 * 60
+
+
+def serve_layout():
+    """Build the page layout; called on every page load so each visitor gets
+    a fresh session id for the server-side figure registry."""
+    return html.Div(
+        style={"display": "flex", "fontFamily": "Arial, sans-serif", "minHeight": "100vh"},
+        children=[
+            # --- Left panel: Inputs ---
+            html.Div(
+                style={
+                    "width": "380px",
+                    "padding": "20px",
+                    "backgroundColor": "#f8f9fa",
+                    "borderRight": "1px solid #dee2e6",
+                    "overflowY": "auto",
+                },
+                children=[
+                    html.H2("GDD Crop Phenology Tracker", style={"marginTop": 0}),
+                    html.Hr(),
+
+                    # Map
+                    dcc.Graph(id="map-graph", figure=build_map_figure(),
+                              config={"scrollZoom": True},
+                              style={"marginBottom": "12px"}),
+
+                    # Location search
+                    html.Label("Search Location", style={"fontWeight": "bold"}),
+                    dcc.Input(
+                        id="input-search",
+                        type="text",
+                        placeholder="e.g. La Trinidad, Benguet",
+                        style={"width": "100%", "marginBottom": "6px"},
+                    ),
+                    html.Button(
+                        "Search",
+                        id="btn-search",
+                        n_clicks=0,
+                        style={"width": "100%", "marginBottom": "12px"},
+                    ),
+
+                    # Lat / Lon
+                    html.Div(style={"display": "flex", "gap": "10px", "marginBottom": "12px"}, children=[
+                        html.Div(style={"flex": 1}, children=[
+                            html.Label("Latitude"),
+                            dcc.Input(id="input-lat", type="number", debounce=True, style={"width": "100%"}),
+                        ]),
+                        html.Div(style={"flex": 1}, children=[
+                            html.Label("Longitude"),
+                            dcc.Input(id="input-lon", type="number", debounce=True, style={"width": "100%"}),
+                        ]),
                     ]),
-                    html.Div(style={"flex": 1}, children=[
-                        html.Label("Longitude"),
-                        dcc.Input(id="input-lon", type="number", style={"width": "100%"}),
-                    ]),
-                ]),
-
-                html.Div(id="location-name", style={"marginBottom": "12px", "fontStyle": "italic"}),
-
-                html.Hr(),
-
-                # Crop name
-                html.Label("Crop", style={"fontWeight": "bold"}),
-                dcc.Dropdown(
-                    id="dropdown-crop-name",
-                    options=crop_name_options,
-                    placeholder="Select a crop...",
-                    style={"marginBottom": "8px"},
-                ),
-
-                # Season / variant
-                html.Label("Season", style={"fontWeight": "bold"}),
-                dcc.Dropdown(
-                    id="dropdown-variant",
-                    placeholder="Select season...",
-                    style={"marginBottom": "12px"},
-                ),
-
-                # Mode
-                html.Label("Mode", style={"fontWeight": "bold"}),
-                dcc.RadioItems(
-                    id="radio-mode",
-                    options=[
-                        {"label": " Check Progress (past planting)", "value": "check"},
-                        {"label": " Plan Harvest (future planting)", "value": "plan"},
-                    ],
-                    value="check",
-                    style={"marginBottom": "12px"},
-                ),
-
-                # Planting date
-                html.Label("Planting Date", style={"fontWeight": "bold"}),
-                dcc.DatePickerSingle(
-                    id="datepicker-planting",
-                    placeholder="Select date...",
-                    style={"marginBottom": "12px"},
-                ),
-
-                # Compute button
-                html.Button(
-                    "Compute GDD",
-                    id="btn-compute",
-                    n_clicks=0,
-                    style={
-                        "width": "100%",
-                        "padding": "10px",
-                        "backgroundColor": "#28a745",
-                        "color": "white",
-                        "border": "none",
-                        "borderRadius": "4px",
-                        "fontWeight": "bold",
-                        "fontSize": "14px",
-                        "cursor": "pointer",
-                        "marginBottom": "16px",
-                    },
-                ),
-
-                # Documentation link
-                html.A(
-                    "Documentation",
-                    href="https://open-meteo.com/en/docs",
-                    target="_blank",
-                    style={
-                        "display": "block",
-                        "textAlign": "center",
-                        "color": "#007bff",
-                        "fontSize": "13px",
-                    },
-                ),
-
-                # Hidden stores
-                dcc.Store(id="store-location", data={}),
-                dcc.Store(id="store-report", data={}),
-                dcc.Store(id="store-chart", data={}),
-            ],
-        ),
 
-        # --- Right panel: Outputs ---
-        html.Div(
-            style={"flex": "1", "padding": "20px", "overflowY": "auto"},
-            children=[
-                # GDD stage thresholds table
-                html.Div(id="stage-table"),
-
-                # Results
-                dcc.Loading(
-                    id="loading-results",
-                    type="default",
-                    children=html.Div(id="results-panel"),
-                ),
-
-                html.Div(style={"height": "20px"}),
-
-                # GDD Chart
-                dcc.Loading(
-                    id="loading-chart",
-                    type="default",
-                    children=dcc.Graph(id="gdd-chart", figure=go.Figure()),
-                ),
-
-                # Temperature Chart
-                dcc.Loading(
-                    id="loading-temp-chart",
-                    type="default",
-                    children=dcc.Graph(id="temp-chart", figure=go.Figure()),
-                ),
-
-                html.Div(style={"height": "12px"}),
-
-                # Download PDF
-                html.Button(
-                    "Download PDF Report",
-                    id="btn-download",
-                    n_clicks=0,
-                    style={
-                        "width": "100%",
-                        "padding": "10px",
-                        "backgroundColor": "#007bff",
-                        "color": "white",
-                        "border": "none",
-                        "borderRadius": "4px",
-                        "fontWeight": "bold",
-                        "fontSize": "14px",
-                        "cursor": "pointer",
-                        "marginTop": "12px",
-                        "display": "none",
-                    },
-                ),
-                dcc.Download(id="download-pdf"),
-            ],
-        ),
-    ],
-)
+                    html.Div(id="location-name", style={"marginBottom": "12px", "fontStyle": "italic"}),
+
+                    html.Hr(),
+
+                    # Crop name
+                    html.Label("Crop", style={"fontWeight": "bold"}),
+                    dcc.Dropdown(
+                        id="dropdown-crop-name",
+                        options=crop_name_options,
+                        placeholder="Select a crop...",
+                        style={"marginBottom": "8px"},
+                    ),
+
+                    # Season / variant
+                    html.Label("Season", style={"fontWeight": "bold"}),
+                    dcc.Dropdown(
+                        id="dropdown-variant",
+                        placeholder="Select season...",
+                        style={"marginBottom": "12px"},
+                    ),
+
+                    # Mode
+                    html.Label("Mode", style={"fontWeight": "bold"}),
+                    dcc.RadioItems(
+                        id="radio-mode",
+                        options=[
+                            {"label": " Check Progress (past planting)", "value": "check"},
+                            {"label": " Plan Harvest (future planting)", "value": "plan"},
+                        ],
+                        value="check",
+                        style={"marginBottom": "12px"},
+                    ),
+
+                    # Planting date
+                    html.Label("Planting Date", style={"fontWeight": "bold"}),
+                    dcc.DatePickerSingle(
+                        id="datepicker-planting",
+                        placeholder="Select date...",
+                        style={"marginBottom": "12px"},
+                    ),
+
+                    # Compute button
+                    html.Button(
+                        "Compute GDD",
+                        id="btn-compute",
+                        n_clicks=0,
+                        style={
+                            "width": "100%",
+                            "padding": "10px",
+                            "backgroundColor": "#28a745",
+                            "color": "white",
+                            "border": "none",
+                            "borderRadius": "4px",
+                            "fontWeight": "bold",
+                            "fontSize": "14px",
+                            "cursor": "pointer",
+                            "marginBottom": "16px",
+                        },
+                    ),
+
+                    # Documentation link
+                    html.A(
+                        "Documentation",
+                        href="https://open-meteo.com/en/docs",
+                        target="_blank",
+                        style={
+                            "display": "block",
+                            "textAlign": "center",
+                            "color": "#007bff",
+                            "fontSize": "13px",
+                        },
+                    ),
+
+                    # Hidden stores
+                    dcc.Store(id="store-session", data=str(uuid.uuid4())),
+                    dcc.Store(id="store-location", data={}),
+                    dcc.Store(id="store-report", data={}),
+                    dcc.Store(id="store-chart", data={}),
+                ],
+            ),
+
+            # --- Right panel: Outputs ---
+            html.Div(
+                style={"flex": "1", "padding": "20px", "overflowY": "auto"},
+                children=[
+                    # GDD stage thresholds table
+                    html.Div(id="stage-table"),
+
+                    # Results
+                    dcc.Loading(
+                        id="loading-results",
+                        type="default",
+                        children=html.Div(id="results-panel"),
+                    ),
+
+                    html.Div(style={"height": "20px"}),
+
+                    # GDD Chart
+                    dcc.Loading(
+                        id="loading-chart",
+                        type="default",
+                        children=dcc.Graph(id="gdd-chart", figure=go.Figure()),
+                    ),
+
+                    # Temperature Chart
+                    dcc.Loading(
+                        id="loading-temp-chart",
+                        type="default",
+                        children=dcc.Graph(id="temp-chart", figure=go.Figure()),
+                    ),
+
+                    html.Div(style={"height": "12px"}),
+
+                    # Download PDF
+                    html.Button(
+                        "Download PDF Report",
+                        id="btn-download",
+                        n_clicks=0,
+                        style={**_DOWNLOAD_BTN_VISIBLE, "display": "none"},
+                    ),
+                    dcc.Download(id="download-pdf"),
+                ],
+            ),
+        ],
+    )
+
+
+app.layout = serve_layout
 
 
 # ---------------------------------------------------------------------------
@@ -635,11 +836,16 @@ def geocode_search(n_clicks, search_text):
     State("store-location", "data"),
 )
 def update_map(lat, lon, loc_data):
-    if lat is None or lon is None:
-        return build_map_figure()
-
     name = loc_data.get("name", "") if loc_data else ""
-    return build_map_figure(lat, lon, name)
+    marker, view = map_view(lat, lon, name)
+
+    # Only send the changed marker and view, not the whole map figure
+    patched_map = Patch()
+    for key, value in marker.items():
+        patched_map["data"][0][key] = value
+    patched_map["layout"]["mapbox"]["center"] = view["center"]
+    patched_map["layout"]["mapbox"]["zoom"] = view["zoom"]
+    return patched_map
 
 
 # Callback 3: Mode toggle -> adjust date picker max/min
@@ -668,13 +874,9 @@ def update_variant_options(crop_name):
         return [], None
 
     variants = crop_variants.get(crop_name, [])
-    options = [
-        {"label": v.title(), "value": v}
-        for v in variants
-    ]
     # Auto-select if only one variant
     default = variants[0] if len(variants) == 1 else None
-    return options, default
+    return _VARIANT_OPTIONS.get(crop_name, []), default
 
 
 # Callback 4: Compute GDD
@@ -694,60 +896,50 @@ def update_variant_options(crop_name):
     State("datepicker-planting", "date"),
     State("radio-mode", "value"),
     State("store-location", "data"),
+    State("store-session", "data"),
+    background=True,
+    interval=250,
+    running=[(Output("btn-compute", "disabled"), True, False)],
     prevent_initial_call=True,
 )
-def compute_gdd(n_clicks, lat, lon, crop_name, variant, planting_date_str, mode, loc_data):
+def compute_gdd(n_clicks, lat, lon, crop_name, variant, planting_date_str, mode, loc_data, session_id):
     if lat is None or lon is None:
-        return None, "Please enter or search for a location.", go.Figure(), go.Figure(), {"display": "none"}, {}, {}
+        return None, "Please enter or search for a location.", go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {}
     if not crop_name or not variant:
-        return None, "Please select a crop and season.", go.Figure(), go.Figure(), {"display": "none"}, {}, {}
+        return None, "Please select a crop and season.", go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {}
 
     crop_id = f"{crop_name}_{variant}"
     if not planting_date_str:
-        return None, "Please select a planting date.", go.Figure(), go.Figure(), {"display": "none"}, {}, {}
+        return None, "Please select a planting date.", go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {}
 
     try:
         planting_date = dt.date.fromisoformat(planting_date_str)
     except ValueError:
-        return None, "Invalid planting date.", go.Figure(), go.Figure(), {"display": "none"}, {}, {}
+        return None, "Invalid planting date.", go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {}
 
     location_name = loc_data.get("name", f"{lat}, {lon}") if loc_data else f"{lat}, {lon}"
     crop_params = crops[crop_id]
     crop_label = crop_id.replace("_", " ").title()
 
-    download_btn_style = {
-        "width": "100%",
-        "padding": "10px",
-        "backgroundColor": "#007bff",
-        "color": "white",
-        "border": "none",
-        "borderRadius": "4px",
-        "fontWeight": "bold",
-        "fontSize": "14px",
-        "cursor": "pointer",
-        "marginTop": "12px",
-        "display": "block",
-    }
-
     today = dt.date.today()
 
-    stage_table = build_stage_table(crop_params, crop_label)
+    stage_table = _STAGE_TABLES[crop_id]
 
     # ---- Mode A: Check Progress ----
     if mode == "check":
         if planting_date > today:
             return (
                 stage_table, "Check mode requires a past planting date.",
-                go.Figure(), go.Figure(), {"display": "none"}, {}, {},
+                go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {},
             )
 
         try:
             weather = fetch_daily_temp(lat, lon, planting_date.isoformat(), today.isoformat())
         except Exception as e:
-            return stage_table, f"Could not fetch weather data: {e}", go.Figure(), go.Figure(), {"display": "none"}, {}, {}
+            return stage_table, f"Could not fetch weather data: {e}", go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {}
 
         if weather.empty:
-            return stage_table, "No weather data available for this location and date range.", go.Figure(), go.Figure(), {"display": "none"}, {}, {}
+            return stage_table, "No weather data available for this location and date range.", go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {}
 
         season = CropSeason(crop_id, planting_date, weather, location_name)
         season.compute_gdd_series()
@@ -771,6 +963,7 @@ def compute_gdd(n_clicks, lat, lon, crop_name, variant, planting_date_str, mode,
             "location": location_name,
             "latitude": lat,
             "longitude": lon,
+            "crop_id": crop_id,
             "crop_label": crop_label,
             "t_base": crop_params["t_base"],
             "t_upper": crop_params["t_upper"],
@@ -782,23 +975,20 @@ def compute_gdd(n_clicks, lat, lon, crop_name, variant, planting_date_str, mode,
             "overall_progress": summary["overall_progress"] * 100,
         }
 
-        return stage_table, results, chart_fig, temp_fig, download_btn_style, report_data, chart_fig.to_json()
+        resampled_figures.set((session_id, "gdd-chart"), chart_fig, expire=_RESAMPLED_FIGURE_TTL)
+        resampled_figures.set((session_id, "temp-chart"), temp_fig, expire=_RESAMPLED_FIGURE_TTL)
+
+        return stage_table, results, chart_fig, temp_fig, _DOWNLOAD_BTN_VISIBLE, report_data, chart_fig.to_plotly_json()
 
     # ---- Mode B: Plan Harvest ----
     else:
         if planting_date <= today:
             return (
                 stage_table, "Plan mode requires a future planting date.",
-                go.Figure(), go.Figure(), {"display": "none"}, {}, {},
+                go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {},
             )
 
-        harvest_gdd = crop_params["stages"]["harvest"]
-        max_daily = crop_params["t_upper"] - crop_params["t_base"]
-        if max_daily > 0:
-            estimated_days = int(harvest_gdd / max_daily) + 60
-        else:
-            estimated_days = 365
-        estimated_days = min(estimated_days, 365)
+        estimated_days = _PLANNING_WINDOW_DAYS[crop_id]
 
         end_date = planting_date + dt.timedelta(days=estimated_days)
         if end_date > dt.date(2050, 12, 31):
@@ -807,10 +997,10 @@ def compute_gdd(n_clicks, lat, lon, crop_name, variant, planting_date_str, mode,
         try:
             weather = fetch_climate_temp(lat, lon, planting_date.isoformat(), end_date.isoformat())
         except Exception as e:
-            return stage_table, f"Could not fetch climate data: {e}", go.Figure(), go.Figure(), {"display": "none"}, {}, {}
+            return stage_table, f"Could not fetch climate data: {e}", go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {}
 
         if weather.empty:
-            return stage_table, "No climate data available for this location and date range.", go.Figure(), go.Figure(), {"display": "none"}, {}, {}
+            return stage_table, "No climate data available for this location and date range.", go.Figure(), go.Figure(), _DOWNLOAD_BTN_HIDDEN, {}, {}
 
         chart_fig, stage_dates = build_planning_chart(
             weather, crop_params, crop_id, location_name, planting_date,
@@ -823,7 +1013,7 @@ def compute_gdd(n_clicks, lat, lon, crop_name, variant, planting_date_str, mode,
             html.P(f"Planting Date: {planting_date.isoformat()}"),
             html.Hr(),
         ]
-        for stage_name in ["initial", "development", "mid_season", "harvest"]:
+        for stage_name in _STAGE_ORDER:
             label = stage_name.replace("_", " ").title()
             if stage_name in stage_dates:
                 est = stage_dates[stage_name]
@@ -839,6 +1029,7 @@ def compute_gdd(n_clicks, lat, lon, crop_name, variant, planting_date_str, mode,
             "location": location_name,
             "latitude": lat,
             "longitude": lon,
+            "crop_id": crop_id,
             "crop_label": crop_label,
             "t_base": crop_params["t_base"],
             "t_upper": crop_params["t_upper"],
@@ -846,7 +1037,10 @@ def compute_gdd(n_clicks, lat, lon, crop_name, variant, planting_date_str, mode,
             "stage_dates": {k: str(v) for k, v in stage_dates.items()},
         }
 
-        return stage_table, results, chart_fig, temp_fig, download_btn_style, report_data, chart_fig.to_json()
+        resampled_figures.set((session_id, "gdd-chart"), chart_fig, expire=_RESAMPLED_FIGURE_TTL)
+        resampled_figures.set((session_id, "temp-chart"), temp_fig, expire=_RESAMPLED_FIGURE_TTL)
+
+        return stage_table, results, chart_fig, temp_fig, _DOWNLOAD_BTN_VISIBLE, report_data, chart_fig.to_plotly_json()
 
 
 # Callback 5: Download PDF
@@ -857,21 +1051,50 @@ def compute_gdd(n_clicks, lat, lon, crop_name, variant, planting_date_str, mode,
     State("store-chart", "data"),
     prevent_initial_call=True,
 )
-def download_pdf(n_clicks, report_data, chart_json):
-    if not report_data or not chart_json:
+def download_pdf(n_clicks, report_data, chart_data):
+    if not report_data or not chart_data:
         return no_update
 
-    try:
-        chart_fig = go.Figure(pio.from_json(chart_json))
-    except Exception:
-        chart_fig = go.Figure()
-
-    pdf_bytes = generate_pdf_report(report_data, chart_fig)
+    pdf_bytes = generate_pdf_report(report_data, chart_data)
 
     crop = report_data.get("crop_label", "crop").replace(" ", "_")
     filename = f"GDD_Report_{crop}_{dt.date.today().isoformat()}.pdf"
 
-    return dcc.send_bytes(pdf_bytes, filename)
+    # Same payload as dcc.send_bytes, built here because send_bytes only
+    # accepts bytes (isinstance check) while b64encode takes the bytearray as-is
+    return dict(
+        content=base64.b64encode(pdf_bytes).decode(),
+        filename=filename,
+        type=None,
+        base64=True,
+    )
+
+
+# Callback 6: Resample charts on zoom / pan
+@callback(
+    Output("gdd-chart", "figure", allow_duplicate=True),
+    Input("gdd-chart", "relayoutData"),
+    State("store-session", "data"),
+    prevent_initial_call=True,
+)
+def resample_gdd_chart(relayout_data, session_id):
+    fig = resampled_figures.get((session_id, "gdd-chart"))
+    if fig is None or not relayout_data:
+        return no_update
+    return fig.construct_update_data_patch(relayout_data)
+
+
+@callback(
+    Output("temp-chart", "figure", allow_duplicate=True),
+    Input("temp-chart", "relayoutData"),
+    State("store-session", "data"),
+    prevent_initial_call=True,
+)
+def resample_temp_chart(relayout_data, session_id):
+    fig = resampled_figures.get((session_id, "temp-chart"))
+    if fig is None or not relayout_data:
+        return no_update
+    return fig.construct_update_data_patch(relayout_data)
 
 
 # ---------------------------------------------------------------------------
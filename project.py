@@ -1,6 +1,7 @@
 import datetime as dt
 import os
 import requests
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -48,6 +49,11 @@ def compute_daily_gdd(tmin, tmax, t_base, t_upper):
         return t_upper - t_base
     return t_avg - t_base
 
+# Compute daily GDD for whole arrays of tmin/tmax (same rule as compute_daily_gdd)
+def compute_daily_gdd_vectorized(tmin, tmax, t_base, t_upper):
+    t_avg = (np.asarray(tmin, dtype=float) + np.asarray(tmax, dtype=float)) / 2.0
+    return np.clip(t_avg, t_base, t_upper) - t_base
+
 # Determine the Growing Stage of the CropSeason based on the current CGDD
 def determine_growing_stage(cumulative_gdd, stages_cumulative):
     initial = stages_cumulative["initial"]
@@ -109,9 +115,11 @@ def build_historical_gdd_dataframe(
         if len(weather_hist) < window_days:
             continue
 
-        daily_gdd = weather_hist.apply(
-            lambda row: compute_daily_gdd(row["tmin"], row["tmax"], t_base, t_upper),
-            axis=1,
+        daily_gdd = compute_daily_gdd_vectorized(
+            weather_hist["tmin"].to_numpy(),
+            weather_hist["tmax"].to_numpy(),
+            t_base,
+            t_upper,
         )
         cumulative_gdd = daily_gdd.cumsum().tolist()
 
@@ -242,11 +250,19 @@ class CropSeason:
         t_base = self.params["t_base"]
         t_upper = self.params["t_upper"]
 
-        self.weather["daily_gdd"] = self.weather.apply(
-            lambda row: compute_daily_gdd(row["tmin"], row["tmax"], t_base, t_upper),
-            axis=1,
+        daily_gdd = compute_daily_gdd_vectorized(
+            self.weather["tmin"].to_numpy(),
+            self.weather["tmax"].to_numpy(),
+            t_base,
+            t_upper,
+        )
+        gdd_columns = pd.DataFrame(
+            {"daily_gdd": daily_gdd, "cumulative_gdd": daily_gdd.cumsum()},
+            index=self.weather.index,
         )
-        self.weather["cumulative_gdd"] = self.weather["daily_gdd"].cumsum()
+        # Drop columns from an earlier call so recomputing does not duplicate them
+        weather_df = self.weather.drop(columns=gdd_columns.columns, errors="ignore")
+        self.weather = pd.concat([weather_df, gdd_columns], axis=1)
 
     # Get current crop stage based on the given date
     def stage_on_date(self, target_date):
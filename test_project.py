@@ -1,7 +1,7 @@
 import pytest
 import datetime as dt
 import pandas as pd
-from project import compute_daily_gdd, determine_growing_stage, CropSeason, crops
+from project import compute_daily_gdd, compute_daily_gdd_vectorized, determine_growing_stage, CropSeason, crops
 
 
 def test_compute_daily_gdd():
@@ -19,6 +19,16 @@ def test_compute_daily_gdd():
     assert result == 20.0
 
 
+def test_compute_daily_gdd_vectorized():
+
+    # Test that the array version matches compute_daily_gdd below, between and above the thresholds.
+    tmin = [5.0, 10.0, 40.0, -10.0]
+    tmax = [7.0, 20.0, 42.0, 40.0]
+    result = compute_daily_gdd_vectorized(tmin, tmax, t_base=10.0, t_upper=30.0)
+    expected = [compute_daily_gdd(lo, hi, 10.0, 30.0) for lo, hi in zip(tmin, tmax)]
+    assert result.tolist() == expected
+
+
 
 def test_determine_growing_stage():
 